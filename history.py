@@ -6,10 +6,16 @@ Created on Thurs Mar 26 2026
 
 """
 
+import os
+import time
+import hashlib
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
+from datetime import datetime as Datetime
+from datetime import timezone as Timezone
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from finance.enumerations import Instrument
 from finance.logging import Logging
@@ -26,7 +32,11 @@ __license__ = "MIT License"
 
 
 pagination_parser = lambda string: str(string) if string != "None" else None
-history_parser = lambda string: pd.to_datetime(string, utc=True).date()
+batch_generator = lambda contents, size: (contents[index:index+size] for index in range(0, len(contents), size))
+history_parser = lambda series: pd.to_datetime(series, utc=True).dt.date
+price_parser = lambda series: series.astype(np.float32)
+volume_parser = lambda series: series.astype(np.int64) if not bool(series.isna().any()) else series.astype(np.float64)
+bars_parameters = {"timeframe": "1Day", "feed": "sip", "limit": "10000"}
 
 
 class AlpacaHistoryURL(WebURL, headers={"accept": "application/json"}):
@@ -35,10 +45,7 @@ class AlpacaHistoryURL(WebURL, headers={"accept": "application/json"}):
         return {"APCA-API-KEY-ID": str(authenticator.identity), "APCA-API-SECRET-KEY": str(authenticator.code)}
 
 
-class AlpacaBarsURL(AlpacaHistoryURL, domain="https://data.alpaca.markets", path=["v2", "stocks", "bars"], parameters={"timeframe": "1Day", "feed": "sip", "limit": "10000"}):
-    @staticmethod
-    def parameters(*args, history, **kwargs): return {"start": history.minimum.strftime("%Y-%m-%d"), "end": history.maximum.strftime("%Y-%m-%d")}
-
+class AlpacaBarsURL(AlpacaHistoryURL, domain="https://data.alpaca.markets", path=["v2", "stocks", "bars"], parameters=bars_parameters):
     @classmethod
     def parameters(cls, *args, **kwargs):
         tickers = cls.tickers(*args, **kwargs)
@@ -47,7 +54,9 @@ class AlpacaBarsURL(AlpacaHistoryURL, domain="https://data.alpaca.markets", path
         return tickers | history | pagination
 
     @staticmethod
-    def tickers(*args, tickers, **kwargs): return {"symbols": ",".join(list(tickers))}
+    def tickers(*args, tickers, **kwargs):
+        if isinstance(tickers, str): return {"symbols": tickers}
+        else: return {"symbols": ",".join(tickers)}
     @staticmethod
     def history(*args, history, **kwargs): return {"start": history.minimum.strftime("%Y-%m-%d"), "end": history.maximum.strftime("%Y-%m-%d")}
     @staticmethod
@@ -62,32 +71,39 @@ class AlpacaHistoryData(WebJSON, multiple=False, optional=False):
 
 @dataclass(frozen=True)
 class AlpacaField: name: str; code: str; parser: callable
+bars_fields = (AlpacaField("open", "o", price_parser), AlpacaField("close", "c", price_parser), AlpacaField("high", "h", price_parser), AlpacaField("low", "l", price_parser), AlpacaField("adjusted", "vw", price_parser))
+bars_fields = bars_fields + (AlpacaField("date", "t", history_parser), AlpacaField("volume", "v", volume_parser))
+bars_header = ["ticker"] + [field.name for field in bars_fields]
 
 
 class AlpacaHistoryPage(WebJSONPage, ABC): pass
 class AlpacaBarsPage(AlpacaHistoryPage):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        fields = [AlpacaField("open", "o", np.float32), AlpacaField("close", "c", np.float32), AlpacaField("high", "h", np.float32), AlpacaField("low", "l", np.float32), AlpacaField("adjusted", "vw", np.float32)]
-        fields = fields + [AlpacaField("date", "t", history_parser), AlpacaField("volume", "v", np.int64)]
-        parser = lambda mapping: {field.name: field.parser(mapping[field.code]) for field in self.fields if field.code in mapping.keys()}
-        self.__fields = fields
+        parser = lambda dataframe: pd.DataFrame({"ticker": dataframe["ticker"]} | {field.name: field.parser(dataframe[field.code]) for field in self.fields if field.code in dataframe.columns})
+        self.__fields = bars_fields
         self.__parser = parser
 
     def __call__(self, *args, tickers, history, **kwargs):
-        parameters = dict(tickers=tickers, history=history, authenticator=self.authenticator)
-        records = self.bars(**parameters)
-        bars = pd.DataFrame.from_records(records)
+        parameters = dict(tickers=",".join(tickers), history=history, authenticator=self.authenticator)
+        columns = self.bars(**parameters)
+        bars = pd.DataFrame(columns)
+        if bool(bars.empty): return pd.DataFrame(columns=bars_header)
+        bars = self.parser(bars)
         return bars
 
-    def bars(self, *args, pagination=None, **kwargs):
-        url = AlpacaBarsURL(*args, pagination=pagination, **kwargs)
-        json = self.load(url)
-        records = [{"ticker": ticker} | self.parser(mapping) for ticker, contents in json["bars"].items() for mapping in contents]
-        datas = AlpacaHistoryData(json, *args, **kwargs)
-        pagination = datas["pagination"](*args, **kwargs)
-        if not bool(pagination): return list(records)
-        else: return list(records) + self.bars(*args, pagination=pagination, **kwargs)
+    def bars(self, *args, **kwargs):
+        columns, codes, pagination = {"ticker": []} | {field.code: [] for field in self.fields}, set(), None
+        while True:
+            url = AlpacaBarsURL(*args, pagination=pagination, **kwargs)
+            json = self.load(url)
+            for ticker, contents in json["bars"].items():
+                columns["ticker"].extend([ticker] * len(contents))
+                codes.update(*contents)
+                for field in self.fields: columns[field.code].extend([mapping.get(field.code) for mapping in contents])
+            datas = AlpacaHistoryData(json, *args, **kwargs)
+            pagination = datas["pagination"](*args, **kwargs)
+            if not bool(pagination): return {code: values for code, values in columns.items() if code == "ticker" or code in codes}
 
     @property
     def fields(self): return self.__fields
@@ -95,12 +111,64 @@ class AlpacaBarsPage(AlpacaHistoryPage):
     def parser(self): return self.__parser
 
 
+class AlpacaBarsCache:
+    def __init__(self, directory, /, duration=86400):
+        self.__directory = os.path.join(os.path.expanduser(str(directory)), "bars")
+        self.__duration = int(duration)
+
+    def get(self, ticker, history):
+        file = self.file(ticker, history)
+        if not os.path.isfile(file): return None
+        modified = os.path.getmtime(file)
+        final = bool(Datetime.fromtimestamp(modified, tz=Timezone.utc).date() > pd.Timestamp(history.maximum).date())
+        expired = bool(time.time() - modified > self.duration)
+        if expired and not final: return None
+        return pd.read_pickle(file)
+
+    def put(self, ticker, history, bars):
+        file = self.file(ticker, history)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        bars.to_pickle(f"{file}.tmp")
+        os.replace(f"{file}.tmp", file)
+
+    def file(self, ticker, history):
+        contents = [str(ticker), history.minimum.strftime("%Y-%m-%d"), history.maximum.strftime("%Y-%m-%d"), bars_parameters["timeframe"], bars_parameters["feed"]]
+        key = hashlib.md5("|".join(contents).encode()).hexdigest()
+        return os.path.join(self.directory, str(ticker), f"{key}.pkl")
+
+    @property
+    def directory(self): return self.__directory
+    @property
+    def duration(self): return self.__duration
+
+
 class AlpacaHistoryDownloader(WebStream, Logging, ABC):
+    def __init__(self, *args, workers=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__workers = int(workers)
+
+    def dispatcher(self, function, contents, /, **kwargs):
+        if self.workers <= 1:
+            for content in contents: yield function(content, **kwargs)
+            return
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [executor.submit(function, content, **kwargs) for content in contents]
+            for future in as_completed(futures): yield future.result()
+        finally: executor.shutdown(wait=False, cancel_futures=True)
+
     @abstractmethod
     def downloader(self, *args, **kwargs): pass
 
+    @property
+    def workers(self): return self.__workers
+
 
 class AlpacaBarsDownloader(AlpacaHistoryDownloader, page=AlpacaBarsPage):
+    def __init__(self, *args, cache=None, duration=86400, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__cache = AlpacaBarsCache(cache, duration=duration) if cache is not None else None
+
     def __call__(self, symbols, /, **kwargs):
         if not isinstance(symbols, list): symbols = [symbols]
         tickers = [symbol.ticker for symbol in list(dict.fromkeys(symbols))]
@@ -112,12 +180,29 @@ class AlpacaBarsDownloader(AlpacaHistoryDownloader, page=AlpacaBarsPage):
         return bars
 
     def downloader(self, tickers, /, **kwargs):
-        tickers = [tickers[index:index+self.capacity] for index in range(0, len(tickers), self.capacity)]
-        for tickers in tickers:
-            bars = self.page(tickers=tickers, **kwargs)
-            if bool(bars.empty): continue
-            self.results(bars, title="Downloaded", instrument=Instrument.STOCK)
-            yield bars
+        for cached, downloaded in self.dispatcher(self.execute, batch_generator(tickers, self.capacity), **kwargs):
+            if not bool(cached.empty):
+                self.results(cached, title="Cached", instrument=Instrument.STOCK)
+                yield cached
+            if not bool(downloaded.empty):
+                self.results(downloaded, title="Downloaded", instrument=Instrument.STOCK)
+                yield downloaded
+
+    def execute(self, tickers, /, history, **kwargs):
+        empty = pd.DataFrame(columns=bars_header)
+        if self.cache is None: return empty, self.page(tickers=tickers, history=history, **kwargs)
+        cached = {ticker: self.cache.get(ticker, history) for ticker in tickers}
+        missing = [ticker for ticker, bars in cached.items() if bars is None]
+        cached = [bars for bars in cached.values() if bars is not None and not bool(bars.empty)]
+        cached = pd.concat(cached, axis=0, ignore_index=True) if bool(cached) else empty
+        if not bool(missing): return cached, empty
+        downloaded = self.page(tickers=missing, history=history, **kwargs)
+        groups = {ticker: bars.reset_index(drop=True, inplace=False) for ticker, bars in downloaded.groupby("ticker", sort=False)}
+        for ticker in missing: self.cache.put(ticker, history, groups.get(ticker, empty))
+        return cached, downloaded
+
+    @property
+    def cache(self): return self.__cache
 
 
 
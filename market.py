@@ -6,11 +6,15 @@ Created on Thurs Mar 19 2026
 
 """
 
+import time
+import multiprocessing
 import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
 from datetime import datetime as Datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 from finance.enumerations import Instrument, Option
 from finance.querys import Symbol, Contract
@@ -28,11 +32,16 @@ __license__ = "MIT License"
 
 
 pagination_parser = lambda string: str(string) if string != "None" else None
-expire_parser = lambda string: Datetime.strptime(string, "%Y-%m-%d").date()
+batch_generator = lambda contents, size: (contents[index:index+size] for index in range(0, len(contents), size))
+expire_parser = lru_cache(maxsize=4096)(lambda string: Datetime.strptime(string, "%Y-%m-%d").date())
+osi_parser = lru_cache(maxsize=65536)(OSI.parse)
 strike_parser = lambda string: np.round(float(string), 2)
+bounds_parser = lambda bounds: (bounds.minimum, bounds.maximum) if bounds is not None else None
+symbol_header = list(Symbol)
+contract_header = list(Contract)
 
 
-class AlpacaMarketURL(WebURL, headers={"accept": "application/json"}):
+class AlpacaMarketURL(WebURL, headers={"accept": "application/json", "accept-encoding": "gzip, deflate"}):
     @staticmethod
     def headers(*args, authenticator, **kwargs):
         return {"APCA-API-KEY-ID": str(authenticator.identity), "APCA-API-SECRET-KEY": str(authenticator.code)}
@@ -42,12 +51,14 @@ class AlpacaSecurityURL(AlpacaMarketURL): pass
 class AlpacaStockURL(AlpacaSecurityURL, domain="https://data.alpaca.markets", path=["v2", "stocks"], parameters={"feed": "delayed_sip"}):
     @staticmethod
     def parameters(*args, tickers, **kwargs):
-        return {"symbols": ",".join(list(tickers))}
+        if isinstance(tickers, str): return {"symbols": tickers}
+        else: return {"symbols": ",".join(tickers)}
 
 class AlpacaOptionURL(AlpacaSecurityURL, domain="https://data.alpaca.markets", path=["v1beta1", "options"], parameters={"feed": "indicative"}):
     @staticmethod
     def parameters(*args, osis, **kwargs):
-        return {"symbols": ",".join(list(osis))}
+        if isinstance(osis, str): return {"symbols": osis}
+        else: return {"symbols": ",".join(osis)}
 
 
 class AlpacaStockTradeURL(AlpacaStockURL, path=["trades", "latest"]): pass
@@ -95,39 +106,46 @@ class AlpacaContractData(WebJSON, multiple=False, optional=False):
 
 @dataclass(frozen=True)
 class AlpacaField: name: str; code: str; parser: callable
+trade_fields = (AlpacaField("last", "p", np.float32),)
+quote_fields = (AlpacaField("bid", "bp", np.float32), AlpacaField("ask", "ap", np.float32), AlpacaField("supply", "as", np.float32), AlpacaField("demand", "bs", np.float32))
 
 
 class AlpacaMarketPage(WebJSONPage, ABC): pass
 class AlpacaSecurityPage(AlpacaMarketPage):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        fields = [AlpacaField("last", "p", np.float32), AlpacaField("bid", "bp", np.float32), AlpacaField("ask", "ap", np.float32), AlpacaField("supply", "as", np.float32), AlpacaField("demand", "bs", np.float32)]
-        parser = lambda mapping: {field.name: field.parser(mapping[field.code]) for field in fields if field.code in mapping.keys()}
-        merger = lambda quotes, trades, on: quotes.merge(trades, on=on, how="left", validate="one_to_one")
-        self.__merger = merger
-        self.__fields = fields
-        self.__parser = parser
+    @staticmethod
+    def parser(contents, /, header, fields):
+        columns = {header: list(contents.keys())}
+        for field in fields:
+            values = (mapping.get(field.code, np.nan) for mapping in contents.values())
+            columns[field.name] = np.fromiter(values, dtype=field.parser, count=len(contents))
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def merger(quotes, trades, on):
+        quotes = quotes.set_index(on, drop=True, inplace=False)
+        trades = trades.set_index(on, drop=True, inplace=False)
+        for field in trade_fields: quotes[field.name] = trades[field.name]
+        return quotes.reset_index(drop=False, inplace=False)
+
+    def securities(self, *args, concurrent=True, **kwargs):
+        if not bool(concurrent): return self.quotes(*args, **kwargs), self.trades(*args, **kwargs)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            trades = executor.submit(self.trades, *args, **kwargs)
+            quotes = self.quotes(*args, **kwargs)
+            return quotes, trades.result()
 
     @abstractmethod
     def trades(self, *args, **kwargs): pass
     @abstractmethod
     def quotes(self, *args, **kwargs): pass
 
-    @property
-    def fields(self): return self.__fields
-    @property
-    def parser(self): return self.__parser
-    @property
-    def merger(self): return self.__merger
-
 
 class AlpacaStockPage(AlpacaSecurityPage):
-    def __call__(self, *args, tickers, **kwargs):
+    def __call__(self, *args, tickers, concurrent=True, **kwargs):
         assert isinstance(tickers, list)
-        tickers = list(map(str, tickers))
+        tickers = ",".join(map(str, tickers))
         parameters = dict(tickers=tickers, authenticator=self.authenticator)
-        trades = self.trades(**parameters)
-        quotes = self.quotes(**parameters)
+        quotes, trades = self.securities(concurrent=concurrent, **parameters)
         if quotes.empty: return None
         stocks = self.merger(quotes, trades, on="ticker")
         return stocks
@@ -135,40 +153,54 @@ class AlpacaStockPage(AlpacaSecurityPage):
     def trades(self, *args, **kwargs):
         url = AlpacaStockTradeURL(*args, **kwargs)
         json = self.load(url)["trades"]
-        records = [{"ticker": ticker} | self.parser(mapping) for ticker, mapping in json.items()]
-        dataframe = pd.DataFrame.from_records(records)
+        dataframe = self.parser(json, header="ticker", fields=trade_fields)
         return dataframe
 
     def quotes(self, *args, **kwargs):
         url = AlpacaStockQuoteURL(*args, **kwargs)
-        downloaded = self.load(url)["quotes"]
-        json = [{"ticker": ticker} | self.parser(mapping) for ticker, mapping in downloaded.items()]
-        dataframe = pd.DataFrame.from_records(json)
+        json = self.load(url)["quotes"]
+        dataframe = self.parser(json, header="ticker", fields=quote_fields)
         return dataframe
 
 
 class AlpacaContractPage(AlpacaMarketPage):
-    def __call__(self, *args, ticker, expires=None, strikes=None, **kwargs):
+    def __call__(self, *args, ticker, expires=None, strikes=None, prefetch=True, **kwargs):
         parameters = dict(ticker=ticker, expires=expires, strikes=strikes, authenticator=self.authenticator)
-        contracts = self.contracts(**parameters)
+        contracts = self.contracts(prefetch=prefetch, **parameters)
         return contracts
 
-    def contracts(self, *args, pagination=None, **kwargs):
-        url = AlpacaContractURL(*args, pagination=pagination, **kwargs)
-        json = self.load(url)
-        datas = AlpacaContractData(json, *args, **kwargs)
-        records = [data(*args, **kwargs) for data in datas["contracts"]]
-        pagination = datas["pagination"](*args, **kwargs)
-        if not bool(pagination): return list(records)
-        else: return list(records) + self.contracts(*args, pagination=pagination, **kwargs)
+    def contracts(self, *args, prefetch=True, **kwargs):
+        records = []
+        for datas in self.pages(*args, prefetch=prefetch, **kwargs):
+            records.extend([data(*args, **kwargs) for data in datas["contracts"]])
+        return records
+
+    def pages(self, *args, prefetch=True, **kwargs):
+        if not bool(prefetch):
+            url = AlpacaContractURL(*args, pagination=None, **kwargs)
+            while url is not None:
+                json = self.load(url)
+                datas = AlpacaContractData(json, *args, **kwargs)
+                pagination = datas["pagination"](*args, **kwargs)
+                url = AlpacaContractURL(*args, pagination=pagination, **kwargs) if bool(pagination) else None
+                yield datas
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            url = AlpacaContractURL(*args, pagination=None, **kwargs)
+            future = executor.submit(self.load, url)
+            while future is not None:
+                json = future.result()
+                datas = AlpacaContractData(json, *args, **kwargs)
+                pagination = datas["pagination"](*args, **kwargs)
+                url = AlpacaContractURL(*args, pagination=pagination, **kwargs) if bool(pagination) else None
+                future = executor.submit(self.load, url) if url is not None else None
+                yield datas
 
 
 class AlpacaOptionPage(AlpacaSecurityPage):
-    def __call__(self, *args, contracts, **kwargs):
-        osis = list(map(lambda contract: str(OSI(contract)), contracts))
-        parameters = dict(osis=osis, authenticator=self.authenticator)
-        trades = self.trades(**parameters)
-        quotes = self.quotes(**parameters)
+    def __call__(self, *args, osis, concurrent=True, **kwargs):
+        parameters = dict(osis=",".join(osis), authenticator=self.authenticator)
+        quotes, trades = self.securities(concurrent=concurrent, **parameters)
         if quotes.empty: return None
         options = self.merger(quotes, trades, on="osi")
         return options
@@ -176,44 +208,76 @@ class AlpacaOptionPage(AlpacaSecurityPage):
     def trades(self, *args, **kwargs):
         url = AlpacaOptionTradeURL(*args, **kwargs)
         json = self.load(url)["trades"]
-        records = [{"osi": osi} | self.parser(mapping) for osi, mapping in json.items()]
-        dataframe = pd.DataFrame.from_records(records)
+        dataframe = self.parser(json, header="osi", fields=trade_fields)
         return dataframe
 
     def quotes(self, *args, **kwargs):
         url = AlpacaOptionQuoteURL(*args, **kwargs)
         json = self.load(url)["quotes"]
-        records = [{"osi": osi} | self.parser(mapping) for osi, mapping in json.items()]
-        dataframe = pd.DataFrame.from_records(records)
+        dataframe = self.parser(json, header="osi", fields=quote_fields)
         return dataframe
 
 
 class AlpacaMarketDownloader(WebStream, Logging, ABC):
+    def __init__(self, *args, workers=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__workers = int(workers)
+
+    def dispatcher(self, function, contents, /, **kwargs):
+        if self.workers <= 1:
+            for content in contents: yield function(content, **kwargs)
+            return
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [executor.submit(function, content, **kwargs) for content in contents]
+            for future in as_completed(futures): yield future.result()
+        finally: executor.shutdown(wait=False, cancel_futures=True)
+
     @abstractmethod
     def downloader(self, *args, **kwargs): pass
 
+    @property
+    def workers(self): return self.__workers
+
+
+class AlpacaSecurityDownloader(AlpacaMarketDownloader, ABC):
+    def __init__(self, *args, concurrent=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__concurrent = bool(concurrent)
+
+    @property
+    def concurrent(self): return self.__concurrent
+
 
-class AlpacaStockDownloader(AlpacaMarketDownloader, page=AlpacaStockPage):
+class AlpacaStockDownloader(AlpacaSecurityDownloader, page=AlpacaStockPage):
     def __call__(self, symbols, /, **kwargs):
         if not isinstance(symbols, list): symbols = [symbols]
         tickers = [symbol.ticker for symbol in list(dict.fromkeys(symbols))]
         stocks = self.downloader(tickers, **kwargs)
         stocks = pd.concat(list(stocks), axis=0)
-        stocks = stocks.sort_values(by=list(Symbol), inplace=False)
+        stocks = stocks.sort_values(by=symbol_header, inplace=False)
         stocks = stocks.reset_index(drop=True, inplace=False)
         return stocks
 
     def downloader(self, tickers, /, **kwargs):
-        tickers = [tickers[index:index+self.capacity] for index in range(0, len(tickers), self.capacity)]
-        for tickers in tickers:
-            stocks = self.page(tickers=tickers, **kwargs)
+        for stocks in self.dispatcher(self.execute, batch_generator(tickers, self.capacity), **kwargs):
             if stocks is None: continue
             if bool(stocks.empty): continue
             self.results(stocks, title="Downloaded", instrument=Instrument.STOCK)
             yield stocks
 
+    def execute(self, tickers, /, **kwargs):
+        return self.page(tickers=tickers, concurrent=self.concurrent, **kwargs)
+
 
 class AlpacaContractDownloader(AlpacaMarketDownloader, page=AlpacaContractPage):
+    def __init__(self, *args, duration=None, prefetch=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__duration = int(duration) if duration is not None else None
+        self.__prefetch = bool(prefetch)
+        self.__mutex = multiprocessing.Lock()
+        self.__cache = dict()
+
     def __call__(self, symbols, /, **kwargs):
         if not isinstance(symbols, list): symbols = [symbols]
         tickers = [symbol.ticker for symbol in list(dict.fromkeys(symbols))]
@@ -223,39 +287,60 @@ class AlpacaContractDownloader(AlpacaMarketDownloader, page=AlpacaContractPage):
         return contracts
 
     def downloader(self, tickers, /, **kwargs):
-        for ticker in tickers:
-            contracts = self.page(ticker=ticker, **kwargs)
-            self.results(contracts, title="Downloaded", instrument=Instrument.CONTRACT)
+        for contracts, cached in self.dispatcher(self.execute, tickers, **kwargs):
+            title = "Cached" if bool(cached) else "Downloaded"
+            self.results(contracts, title=title, instrument=Instrument.CONTRACT)
             for contract in contracts: yield contract
 
+    def execute(self, ticker, /, expires=None, strikes=None, **kwargs):
+        if self.duration is None: return self.page(ticker=ticker, expires=expires, strikes=strikes, prefetch=self.prefetch, **kwargs), False
+        key = (str(ticker), bounds_parser(expires))
+        with self.mutex:
+            current = time.monotonic()
+            stale = [entry for entry, (updated, records) in self.cache.items() if current - updated >= self.duration]
+            for entry in stale: del self.cache[entry]
+            cached = self.cache.get(key, None)
+        if cached is not None: return list(cached[1]), True
+        contracts = self.page(ticker=ticker, expires=expires, strikes=strikes, prefetch=self.prefetch, **kwargs)
+        with self.mutex: self.cache[key] = (time.monotonic(), list(contracts))
+        return contracts, False
+
+    def invalidate(self):
+        with self.mutex: self.cache.clear()
 
-class AlpacaOptionDownloader(AlpacaMarketDownloader, page=AlpacaOptionPage):
+    @property
+    def duration(self): return self.__duration
+    @property
+    def prefetch(self): return self.__prefetch
+    @property
+    def mutex(self): return self.__mutex
+    @property
+    def cache(self): return self.__cache
+
+
+class AlpacaOptionDownloader(AlpacaSecurityDownloader, page=AlpacaOptionPage):
     def __call__(self, contracts, /, **kwargs):
         if not isinstance(contracts, list): contracts = [contracts]
         contracts = list(dict.fromkeys(contracts))
         options = self.downloader(contracts, **kwargs)
         options = pd.concat(list(options), axis=0)
         key = lambda series: series.map(str) if series.name == "option" else series
-        options = options.sort_values(by=list(Contract), inplace=False, key=key)
+        options = options.sort_values(by=contract_header, inplace=False, key=key)
         options = options.reset_index(drop=True, inplace=False)
         return options
 
     def downloader(self, contracts, /, **kwargs):
-        contracts = [contracts[index:index+self.capacity] for index in range(0, len(contracts), self.capacity)]
-        for contracts in contracts:
-            options = self.page(contracts=contracts, **kwargs)
+        for options in self.dispatcher(self.execute, batch_generator(contracts, self.capacity), **kwargs):
             if options is None: continue
             if bool(options.empty): continue
-            contracts = pd.DataFrame.from_records(options["osi"].map(OSI).map(asdict), index=options.index)
-            options = pd.concat([options, contracts], axis=1).drop(columns=["osi"], inplace=False)
             self.results(options, title="Downloaded", instrument=Instrument.OPTION)
             yield options
 
-    @staticmethod
-    def unpack(options):
-        series = options.pop("osi").apply(OSI)
-        options["ticker"] = series.apply(lambda osi: osi.ticker)
-        options["expire"] = series.apply(lambda osi: osi.expire)
-        options["option"] = series.apply(lambda osi: osi.option)
-        options["strike"] = series.apply(lambda osi: osi.strike)
+    def execute(self, contracts, /, **kwargs):
+        securities = {str(security): asdict(security) for security in map(OSI, contracts)}
+        options = self.page(osis=list(securities.keys()), concurrent=self.concurrent, **kwargs)
+        if options is None: return None
+        if bool(options.empty): return options
+        contents = pd.DataFrame.from_records([securities[osi] for osi in options.pop("osi")], index=options.index)
+        for column in contents.columns: options[column] = contents[column].to_numpy(copy=False)
         return options
@@ -13,13 +13,14 @@ from abc import ABC, abstractmethod
 
 from finance.enumerations import Instrument, Position, Status, Tenure, Terms, Intent
 from finance.logging import Logging
-from finance.osi import OSI
 from support.custom import ReversibleDict as RDict
 from webscraping.webpages import WebStream, WebJSONPage
 from webscraping.webpayloads import WebPayload
 from webscraping.webdatas import WebJSON
 from webscraping.weburl import WebURL
 
+from alpaca.market import osi_parser
+
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
 __all__ = ["AlpacaOrderUploader", "AlpacaOrderDownloader", "AlpacaOrder"]
@@ -40,10 +41,10 @@ quantity_formatter = lambda quantity: f"{quantity:.0f}"
 cost_formatter = lambda cost: f"{cost:.2f}"
 
 timestamp_parser = lambda string: pd.to_datetime(string)
-ticker_parser = lambda string: OSI.parse(string).ticker
-expire_parser = lambda string: OSI.parse(string).expire
-option_parser = lambda string: OSI.parse(string).option
-strike_parser = lambda string: OSI.parse(string).strike
+ticker_parser = lambda string: osi_parser(string).ticker
+expire_parser = lambda string: osi_parser(string).expire
+option_parser = lambda string: osi_parser(string).option
+strike_parser = lambda string: osi_parser(string).strike
 intent_parser = lambda string: intent_mapping[parse("{position}_to_{intent}", string)["intent"], True]
 position_parser = lambda string: position_mapping[string, True]
 tenure_parser = lambda string: tenure_mapping[string, True]
@@ -173,7 +174,7 @@ class AlpacaOrderUploader(WebStream, Logging, page=AlpacaUploadingOrderPage):
 class AlpacaOrderDownloader(WebStream, Logging, page=AlpacaDownloadingOrderPage):
     def __call__(self, orders, **kwargs):
         assert isinstance(orders, (list, str))
-        assert all([isinstance(order, str) for order in orders]) if isinstance(orders, list) else True
+        assert all(isinstance(order, str) for order in orders) if isinstance(orders, list) else True
         if isinstance(orders, str): orders = [orders]
         if not bool(orders): return pd.DataFrame(columns=AlpacaOrder)
         holdings = self.downloader(orders, **kwargs)
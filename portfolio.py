@@ -11,12 +11,13 @@ import pandas as pd
 from finance.enumerations import Instrument, Position
 from finance.querys import Contract
 from finance.logging import Logging
-from finance.osi import OSI
 from support.custom import ReversibleDict as RDict
 from webscraping.webpages import WebStream, WebJSONPage
 from webscraping.webdatas import WebJSON
 from webscraping.weburl import WebURL
 
+from alpaca.market import osi_parser
+
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
 __all__ = ["AlpacaPortfolioDownloader", "AlpacaPortfolio"]
@@ -26,10 +27,11 @@ __license__ = "MIT License"
 
 position_mapping = RDict({Position.LONG: "buy", Position.SHORT: "sell"})
 position_parser = lambda string: position_mapping[string, True]
-ticker_parser = lambda string: OSI.parse(string).ticker
-expire_parser = lambda string: OSI.parse(string).expire
-option_parser = lambda string: OSI.parse(string).option
-strike_parser = lambda string: OSI.parse(string).strike
+ticker_parser = lambda string: osi_parser(string).ticker
+expire_parser = lambda string: osi_parser(string).expire
+option_parser = lambda string: osi_parser(string).option
+strike_parser = lambda string: osi_parser(string).strike
+contract_header = list(Contract)
 
 
 AlpacaPortfolio = ["asset", "ticker", "expire", "option", "strike", "position", "quantity", "entry", "spent"]
@@ -68,7 +70,7 @@ class AlpacaPortfolioDownloader(WebStream, Logging, page=AlpacaPortfolioPage):
         portfolio = self.page(**kwargs)
         if bool(portfolio.empty): return pd.DataFrame(columns=AlpacaPortfolio)
         key = lambda series: series.map(str) if series.name == "option" else series
-        portfolio = portfolio.sort_values(by=list(Contract), inplace=False, key=key)
+        portfolio = portfolio.sort_values(by=contract_header, inplace=False, key=key)
         portfolio = portfolio.reset_index(drop=True, inplace=False)
         self.results(portfolio, title="Downloaded", instrument=Instrument.OPTION)
         return portfolio